@@ -1,5 +1,11 @@
+import os
 import sys
+import hashlib
 import logging
+import importlib
+from collections import deque
+from functools import lru_cache
+
 import grpc_tools.protoc
 
 from google.cloud import bigquery_storage_v1
@@ -26,61 +32,74 @@ DATA_TYPE_MAPPING = {
 }
 
 
-# Function to serialize row's data in proto format
-def create_row_data(data, schema):
-    import schema_pb2
-    row = schema_pb2.Schema()
-    for field in schema:
-        field_name = field.name
-        field_value = data.get(field_name)
+# Clients are cached per credentials object so repeated uploads reuse one gRPC channel
+# (the write client multiplexes streams over it) instead of reconnecting per call
+@lru_cache(maxsize=4)
+def get_write_client(write_cred=None):
+    return bigquery_storage_v1.BigQueryWriteClient(credentials=write_cred)
 
-        # Only set the field if the value is not None
-        if field_value is not None:
-            setattr(row, field_name, field_value)
-    return row.SerializeToString()
 
+@lru_cache(maxsize=4)
+def get_bq_client(bq_cred=None):
+    return bigquery.Client(credentials=bq_cred)
+
+
+# Function to serialize row's data in proto format
+def create_row_data(data, field_names, schema_pb2):
+    # Only set fields that belong to the schema and are not None; the kwargs
+    # constructor fills them in one C call instead of a setattr per field
+    return schema_pb2.Schema(
+        **{name: value for name, value in data.items() if value is not None and name in field_names}
+    ).SerializeToString()
 
-# Function to generate proto file basis the schema that a given table has configured
-def generate_proto_file(schema, file_path):
-    proto_file = "syntax = \"proto2\";\n\npackage schema;\n\n"
-    proto_message = "message Schema {\n"
 
-    for index, field in enumerate(schema):
-        field_name = field.name
-        field_type = field.field_type
+# Function to generate proto file basis the schema that a given table has configured
+def generate_proto_file(schema, file_path, package="schema"):
+    lines = [f"syntax = \"proto2\";\n\npackage {package};\n\nmessage Schema {{"]
 
-        if field_type not in DATA_TYPE_MAPPING:
-            raise ValueError(f"Field type {field_type} not supported by Proto yet")
-        proto_field = f"  required {DATA_TYPE_MAPPING[field_type]} {field_name} = {index + 1};\n"
-        proto_message += proto_field
+    for index, field in enumerate(schema, 1):
+        proto_type = DATA_TYPE_MAPPING.get(field.field_type)
+        if proto_type is None:
+            raise ValueError(f"Field type {field.field_type} not supported by Proto yet")
+        lines.append(f"  required {proto_type} {field.name} = {index};")
 
-    proto_message += "}\n"
-    proto_message = proto_file + proto_message
+    lines.append("}\n")
     with open(file_path, "w") as proto_file:
-        proto_file.write(proto_message)
+        proto_file.write("\n".join(lines))
 
     logger.info("Proto file generated successfully")
 
 
+# Function to load the compiled proto module for a schema, compiling it only once per schema shape.
+# Module and package names carry a hash of the schema so different tables never collide in the
+# protobuf descriptor pool and a changed schema never picks up a stale module.
+def load_schema_module(schema):
+    schema_key = hashlib.blake2b(
+        repr([(field.name, field.field_type) for field in schema]).encode(), digest_size=8
+    ).hexdigest()
+    module_name = f"schema_{schema_key}_pb2"
+
+    if not os.path.exists(f"/tmp/{module_name}.py"):
+        proto_file_path = f"/tmp/schema_{schema_key}.proto"
+        generate_proto_file(schema, proto_file_path, package=f"schema_{schema_key}")
+        grpc_tools.protoc.main(['protoc', '-I/tmp', '--python_out=/tmp', proto_file_path])
+        importlib.invalidate_caches()
+        logger.info("Compiled proto file successfully")
+
+    return importlib.import_module(module_name)
+
+
 def stream_data_to_bigquery(project_id, dataset_id, table_id, data, bq_cred=None, write_cred=None):
     # Configuring Bigquery client to fetch table's schema
-    bq_client = bigquery.Client(credentials=bq_cred)
+    bq_client = get_bq_client(bq_cred)
     table_ref = bq_client.get_table(f"{project_id}.{dataset_id}.{table_id}")
     schema = table_ref.schema
 
-    # Generating proto file basis the schema that a given table has configured
-    proto_file_path = "/tmp/schema.proto"
-    generate_proto_file(schema, proto_file_path)
-
-    # Compiling the proto file to generate the python file
-    grpc_tools.protoc.main(['protoc', '-I/tmp', '--python_out=/tmp', proto_file_path])
-    logger.info("Compiled proto file successfully")
-
-    # THis import cannot be outside the function as the proto file is generated dynamically
-    import schema_pb2
+    # Generating and compiling the proto file basis the table's schema (cached per schema shape)
+    schema_pb2 = load_schema_module(schema)
 
     # Following code is used to write data to Bigquery using storage write API but in a streaming fashion
-    client = bigquery_storage_v1.BigQueryWriteClient(credentials=write_cred)
+    client = get_write_client(write_cred)
     parent = client.table_path(project_id, dataset_id, table_id)
     write_stream = types.WriteStream()
     write_stream.type_ = types.WriteStream.Type.COMMITTED
@@ -102,22 +121,34 @@ def stream_data_to_bigquery(project_id, dataset_id, table_id, data, bq_cred=None
 
     append_rows_stream = writer.AppendRowsStream(client, request_template)
 
+    field_names = frozenset(field.name for field in schema)
+
     # Setting batch size to 500
     batch_size = 500
+    # Keep several appends in flight instead of waiting a full round trip per batch;
+    # the stream preserves ordering, so only the oldest future needs to be awaited
+    max_in_flight = 8
+    in_flight = deque()
     for i in range(0, len(data), batch_size):
         batch_data = data[i:i + batch_size]
 
-        proto_rows = types.ProtoRows()
-        for row in batch_data:
-            proto_rows.serialized_rows.append(create_row_data(row, schema))
-
-        request = types.AppendRowsRequest()
-        proto_data = types.AppendRowsRequest.ProtoData()
-        proto_data.rows = proto_rows
-        request.proto_rows = proto_data
-
-        response_future = append_rows_stream.send(request)
-        logger.info(f"Result {response_future.result()}")
+        # Build the request in one nested constructor call: assigning sub-messages
+        # onto proto-plus wrappers copies them, and per-row append() is a Python loop.
+        # A single reused request is not safe here since sends are pipelined.
+        request = types.AppendRowsRequest(
+            proto_rows=types.AppendRowsRequest.ProtoData(
+                rows=types.ProtoRows(
+                    serialized_rows=[create_row_data(row, field_names, schema_pb2) for row in batch_data]
+                )
+            )
+        )
+
+        in_flight.append(append_rows_stream.send(request))
+        if len(in_flight) >= max_in_flight:
+            logger.info(f"Result {in_flight.popleft().result()}")
+
+    while in_flight:
+        logger.info(f"Result {in_flight.popleft().result()}")
 
     logger.info(f"Data successfully streamed to {project_id}.{dataset_id}.{table_id} table")
 
@@ -9,6 +9,7 @@ import pandas as pd
 from google.cloud import bigquery
 
 from common.logging_utils import logger
+from big_query.bq_utils import align_to_schema, get_client, get_table_cached, run_with_table_refresh
 
 
 def insert_batch(
@@ -36,44 +37,48 @@ def insert_batch(
             "job_id": None,
         }
 
-    client = bigquery.Client(project=project_id)
+    client = get_client(project_id)
 
     try:
-        target_table = client.get_table(table_id)
+        target_table = get_table_cached(client, table_id)
     except Exception as exc:
         logger.error("Failed to fetch BigQuery table %s: %s", table_id, exc)
         raise
 
-    target_columns = [field.name for field in target_table.schema]
+    return run_with_table_refresh(
+        client,
+        table_id,
+        target_table,
+        lambda table: _load_into_table(df, table_id, client, table),
+    )
 
-    df_to_load = df.copy()
-    
-    # Set timestamps for any null values if columns exist in both DataFrame and target schema
-    
-    current_time = pd.Timestamp.utcnow().floor("s")
-    
-    if "created_at" in target_columns:
-        df_to_load["created_at"] = current_time
 
-    if "updated_at" in target_columns:
-        df_to_load["updated_at"] = current_time
+def _load_into_table(
+    df: pd.DataFrame,
+    table_id: str,
+    client: bigquery.Client,
+    target_table: bigquery.Table,
+) -> Dict[str, Any]:
+    """Align ``df`` to ``target_table``'s schema and append it with a load job."""
 
-    extra_columns = set(df_to_load.columns) - set(target_columns)
-    if extra_columns:
-        logger.debug(
-            "Dropping columns not present in target schema: %s",
-            ", ".join(sorted(extra_columns)),
-        )
-        df_to_load = df_to_load.drop(columns=list(extra_columns))
+    df_to_load = align_to_schema(df, target_table)
 
-    for column in target_columns:
-        if column not in df_to_load.columns:
-            df_to_load[column] = None
+    # Stamp load time on the audit columns when the target schema has them
+    current_time = pd.Timestamp.utcnow().floor("s")
 
-    df_to_load = df_to_load[target_columns]
+    if "created_at" in df_to_load.columns:
+        df_to_load["created_at"] = current_time
+
+    if "updated_at" in df_to_load.columns:
+        df_to_load["updated_at"] = current_time
 
+    # Pin Parquet explicitly so the load never falls back to CSV serialization, and
+    # pass the (cached) target schema so the client neither re-fetches the table
+    # nor infers Arrow types from pandas dtypes
     job_config = bigquery.LoadJobConfig(
         write_disposition=bigquery.WriteDisposition.WRITE_APPEND,
+        source_format=bigquery.SourceFormat.PARQUET,
+        schema=target_table.schema,
     )
 
     load_job = client.load_table_from_dataframe(df_to_load, table_id, job_config=job_config)
@@ -3,14 +3,201 @@
 
 from __future__ import annotations
 
+import itertools
+import logging
+import queue
 import uuid
-from typing import Any, Dict
+from typing import Any, Dict, List, Sequence, Tuple
 from datetime import datetime, timedelta, timezone
 
 import pandas as pd
 from google.cloud import bigquery
 
 from common.logging_utils import logger
+from big_query.bq_utils import (
+    align_to_schema,
+    get_client,
+    get_table_cached,
+    run_with_table_refresh,
+)
+
+# Batches up to this many cells skip the staging table and MERGE straight from an
+# UNNEST(@rows) query parameter: one query job instead of create + load + MERGE.
+# Kept well below BigQuery's request size limit for query parameters.
+INLINE_MERGE_MAX_CELLS = 20_000
+
+# Staging tables expire on their own instead of costing a DELETE call per batch
+STAGING_TABLE_TTL = timedelta(hours=1)
+
+# A warm process reuses its staging tables (each load is WRITE_TRUNCATE) while they
+# are younger than this, so steady-state batches skip the CREATE call entirely.
+# Reuse stops well before STAGING_TABLE_TTL so a table never expires mid-MERGE.
+STAGING_TABLE_REUSE = timedelta(minutes=30)
+
+# Idle staging tables per target table as (table_id, created_at) entries. Names
+# combine a per-process tag with a counter, so workers never collide.
+_staging_pool: Dict[str, "queue.SimpleQueue[Tuple[str, datetime]]"] = {}
+_staging_tag = uuid.uuid4().hex[:8]
+_staging_counter = itertools.count()
+
+# Column types that can be bound as STRUCT fields of an array query parameter
+_INLINE_PARAM_TYPES = {
+    "STRING", "BYTES", "INT64", "INTEGER", "FLOAT", "FLOAT64", "NUMERIC", "BIGNUMERIC",
+    "BOOL", "BOOLEAN", "TIMESTAMP", "DATETIME", "DATE", "TIME",
+}
+
+
+def _partition_window(df: pd.DataFrame) -> Tuple[datetime, datetime]:
+    """Return the [lb, ub) UTC day window covering the batch's ``timestamp`` values."""
+
+    # Determine partition window bounds from the batch to enable partition pruning on target.
+    # Expect a 'timestamp' column in df per schema. Coerce to UTC-aware datetimes,
+    # skipping the full re-parse when the column is already datetime-typed.
+    if "timestamp" in df.columns and len(df) > 0:
+        ts_series = df["timestamp"]
+        if not pd.api.types.is_datetime64_any_dtype(ts_series):
+            ts_series = pd.to_datetime(ts_series, utc=True, errors="coerce")
+        elif ts_series.dt.tz is None:
+            ts_series = ts_series.dt.tz_localize("UTC")
+        else:
+            # Metadata-only for tz-aware data; keeps day bounds in UTC
+            ts_series = ts_series.dt.tz_convert("UTC")
+        ts_min = ts_series.min()
+        ts_max = ts_series.max()
+    else:
+        ts_min = None
+        ts_max = None
+
+    # Compute [lb, ub) window at day granularity; default to current day if unknown
+    now_utc = datetime.now(timezone.utc)
+    if pd.isna(ts_min) or pd.isna(ts_max):
+        lb = datetime(now_utc.year, now_utc.month, now_utc.day, tzinfo=timezone.utc)
+        ub = lb + timedelta(days=1)
+    else:
+        lb = datetime(ts_min.year, ts_min.month, ts_min.day, tzinfo=timezone.utc)
+        # If all within same day, choose next day; else use day after max
+        if ts_max.tzinfo is None:
+            ts_max = ts_max.replace(tzinfo=timezone.utc)
+        next_day_after_max = datetime(ts_max.year, ts_max.month, ts_max.day, tzinfo=timezone.utc) + timedelta(days=1)
+        ub = next_day_after_max
+
+    return lb, ub
+
+
+def _build_merge_sql(
+    table_id: str,
+    source_sql: str,
+    target_columns: List[str],
+    compare_columns: Sequence[str] = (),
+) -> str:
+    """Build the record_id MERGE of ``source_sql`` rows into ``table_id``.
+
+    With ``compare_columns``, a matched row is only rewritten when one of those
+    columns changed, so a re-sent row keeps its stored ``updated_at``. Without
+    them every match is updated and ``updated_at`` tracks the last time seen.
+    """
+
+    # For WHEN MATCHED: update all columns except created_at (preserve existing created_at)
+    updatable_columns = [col for col in target_columns if col != "created_at"]
+    update_clauses = [f"target.{col} = source.{col}" for col in updatable_columns]
+
+    compare_columns = [col for col in compare_columns if col in target_columns]
+    matched_clause = "WHEN MATCHED THEN\n"
+    if compare_columns:
+        matched_clause = (
+            "WHEN MATCHED AND TO_JSON_STRING(STRUCT("
+            + ", ".join(f"target.{col}" for col in compare_columns)
+            + ")) != TO_JSON_STRING(STRUCT("
+            + ", ".join(f"source.{col}" for col in compare_columns)
+            + ")) THEN\n"
+        )
+
+    # Note: We reference @lb/@ub both in USING filter and ON clause to allow partition pruning
+    return (
+        f"MERGE `{table_id}` AS target\n"
+        f"USING (\n"
+        f"  SELECT * FROM {source_sql}\n"
+        f"  WHERE timestamp >= @lb AND timestamp < @ub\n"
+        f") AS source\n"
+        "  ON target.record_id = source.record_id\n"
+        " AND target.timestamp >= @lb AND target.timestamp < @ub\n"
+        f"{matched_clause}"
+        f"  UPDATE SET {', '.join(update_clauses)}\n"
+        "WHEN NOT MATCHED THEN\n"
+        "  INSERT ROW"
+    )
+
+
+def _can_merge_inline(df: pd.DataFrame, schema: List[bigquery.SchemaField]) -> bool:
+    """Whether the batch is small and flat enough to bind as a query parameter."""
+
+    if len(df) * len(schema) > INLINE_MERGE_MAX_CELLS:
+        return False
+    return all(field.mode != "REPEATED" and field.field_type in _INLINE_PARAM_TYPES for field in schema)
+
+
+def _rows_parameter(df: pd.DataFrame, schema: List[bigquery.SchemaField]) -> bigquery.ArrayQueryParameter:
+    """Bind ``df`` as an ARRAY<STRUCT<...>> parameter typed by the target schema."""
+
+    # Native Python scalars with None for every null flavour (NaN, NaT, pd.NA)
+    records = df.astype(object).where(df.notna(), None).to_dict(orient="records")
+    struct_type = bigquery.StructQueryParameterType(
+        *[bigquery.ScalarQueryParameterType(field.field_type, name=field.name) for field in schema]
+    )
+    values = [
+        bigquery.StructQueryParameter(
+            None,
+            *[bigquery.ScalarQueryParameter(field.name, field.field_type, row[field.name]) for field in schema],
+        )
+        for row in records
+    ]
+    return bigquery.ArrayQueryParameter("rows", struct_type, values)
+
+
+def _acquire_staging_table(
+    client: bigquery.Client,
+    table_id: str,
+    target_table: bigquery.Table,
+) -> Tuple[str, datetime]:
+    """Take a fresh-enough idle staging table for ``table_id`` or create a new one."""
+
+    pool = _staging_pool.setdefault(table_id, queue.SimpleQueue())
+    now = datetime.now(timezone.utc)
+    while True:
+        try:
+            staging_table_id, created_at = pool.get_nowait()
+        except queue.Empty:
+            break
+        if now - created_at < STAGING_TABLE_REUSE:
+            return staging_table_id, created_at
+        # Too close to expiry; BigQuery drops it on its own
+
+    staging_table_id = f"{table_id}_staging_{_staging_tag}_{next(_staging_counter)}"
+    staging_table = bigquery.Table(staging_table_id, schema=target_table.schema)
+    # Mirror the target's layout so the MERGE join lines up partition-for-partition and
+    # block pruning on record_id applies. Partition expiration is deliberately not copied:
+    # it could silently drop older rows from the batch before the MERGE reads them.
+    if target_table.time_partitioning is not None:
+        staging_table.time_partitioning = bigquery.TimePartitioning(
+            type_=target_table.time_partitioning.type_,
+            field=target_table.time_partitioning.field,
+        )
+    staging_table.clustering_fields = target_table.clustering_fields or ["record_id"]
+    staging_table.expires = now + STAGING_TABLE_TTL
+    client.create_table(staging_table)
+
+    return staging_table_id, now
+
+
+def _merge_sync(client: bigquery.Client, merge_sql: str, params: List[Any]) -> str:
+    """Run ``merge_sql`` through the synchronous jobs.query endpoint.
+
+    ``query_and_wait`` returns inline once the statement finishes instead of inserting
+    a job and polling it, which dominates latency for small MERGEs. Returns the job id.
+    """
+
+    rows = client.query_and_wait(merge_sql, job_config=bigquery.QueryJobConfig(query_parameters=params))
+    return rows.job_id
 
 
 def upsert_batch(
@@ -18,11 +205,14 @@ def upsert_batch(
     table_name: str,
     project_id: str,
     dataset: str,
+    compare_columns: Sequence[str] = (),
 ) -> Dict[str, Any]:
     """Perform a batch upsert (MERGE) of `df` into the specified BigQuery table.
 
     Uses `record_id` as the merge key. When a match is found, all columns from the
     staging data overwrite the existing row. When not matched, a new row is inserted.
+    If `compare_columns` is given, matches whose values in those columns are
+    unchanged are left as they are.
     """
 
     table_id = f"{project_id}.{dataset}.{table_name}"
@@ -36,105 +226,86 @@ def upsert_batch(
             "staging_table": None,
         }
 
-    client = bigquery.Client(project=project_id)
-    target_table = client.get_table(table_id)
-    target_columns = [field.name for field in target_table.schema]
-
     if "record_id" not in df.columns:
         raise ValueError("DataFrame must include 'record_id' column for merge alignment")
 
-    original_columns = set(df.columns)
-    df = df.copy()
-
-    extra_columns = original_columns - set(target_columns)
-    if extra_columns:
-        logger.debug(
-            "Dropping columns not present in target schema: %s", ", ".join(sorted(extra_columns))
-        )
-        df = df.drop(columns=list(extra_columns))
+    client = get_client(project_id)
+    target_table = get_table_cached(client, table_id)
 
-    for column in target_columns:
-        if column not in df.columns:
-            df[column] = None
-
-    df = df[target_columns]
+    return run_with_table_refresh(
+        client,
+        table_id,
+        target_table,
+        lambda table: _upsert_into_table(df, table_id, client, table, compare_columns),
+    )
 
-    staging_table_id = f"{table_id}_staging_{uuid.uuid4().hex[:8]}"
-    client.create_table(bigquery.Table(staging_table_id, schema=target_table.schema))
 
-    load_job_config = bigquery.LoadJobConfig(
-        write_disposition=bigquery.WriteDisposition.WRITE_TRUNCATE,
-    )
+def _upsert_into_table(
+    df: pd.DataFrame,
+    table_id: str,
+    client: bigquery.Client,
+    target_table: bigquery.Table,
+    compare_columns: Sequence[str] = (),
+) -> Dict[str, Any]:
+    """Align ``df`` to ``target_table``'s schema and MERGE it on ``record_id``."""
 
-    try:
-        load_job = client.load_table_from_dataframe(df, staging_table_id, job_config=load_job_config)
-        load_job.result()
+    target_columns = [field.name for field in target_table.schema]
 
-        # Determine partition window bounds from the batch to enable partition pruning on target.
-        # Expect a 'timestamp' column in df per schema. Coerce to UTC-aware datetimes.
-        if "timestamp" in df.columns and len(df) > 0:
-            ts_series = pd.to_datetime(df["timestamp"], utc=True, errors="coerce")
-            ts_min = ts_series.min()
-            ts_max = ts_series.max()
-        else:
-            ts_min = None
-            ts_max = None
-
-        # Compute [lb, ub) window at day granularity; default to current day if unknown
-        now_utc = datetime.now(timezone.utc)
-        if pd.isna(ts_min) or pd.isna(ts_max):
-            lb = datetime(now_utc.year, now_utc.month, now_utc.day, tzinfo=timezone.utc)
-            ub = lb + timedelta(days=1)
-        else:
-            lb = datetime(ts_min.year, ts_min.month, ts_min.day, tzinfo=timezone.utc)
-            # If all within same day, choose next day; else use day after max
-            if ts_max.tzinfo is None:
-                ts_max = ts_max.replace(tzinfo=timezone.utc)
-            next_day_after_max = datetime(ts_max.year, ts_max.month, ts_max.day, tzinfo=timezone.utc) + timedelta(days=1)
-            ub = next_day_after_max
+    df = align_to_schema(df, target_table)
 
+    lb, ub = _partition_window(df)
+    debug_enabled = logger.isEnabledFor(logging.DEBUG)
+    if debug_enabled:
         logger.debug("Partition window for MERGE: lb=%s, ub=%s (UTC)", lb.isoformat(), ub.isoformat())
 
-        # Build dynamic MERGE SQL
-        # For WHEN MATCHED: update all columns except created_at (preserve existing created_at)
-        updatable_columns = [col for col in target_columns if col != "created_at"]
-        update_clauses = [f"target.{col} = source.{col}" for col in updatable_columns]
-
-        # Note: We reference @lb/@ub both in USING filter and ON clause to allow partition pruning
-        merge_sql = (
-            f"MERGE `{table_id}` AS target\n"
-            f"USING (\n"
-            f"  SELECT * FROM `{staging_table_id}`\n"
-            f"  WHERE timestamp >= @lb AND timestamp < @ub\n"
-            f") AS source\n"
-            "  ON target.record_id = source.record_id\n"
-            " AND target.timestamp >= @lb AND target.timestamp < @ub\n"
-            f"WHEN MATCHED THEN\n"
-            f"  UPDATE SET {', '.join(update_clauses)}\n"
-            "WHEN NOT MATCHED THEN\n"
-            "  INSERT ROW"
-        )
+    window_params = [
+        bigquery.ScalarQueryParameter("lb", "TIMESTAMP", lb),
+        bigquery.ScalarQueryParameter("ub", "TIMESTAMP", ub),
+    ]
 
-        logger.debug("Executing MERGE SQL with parameters lb/ub:\n%s", merge_sql)
+    if _can_merge_inline(df, target_table.schema):
+        merge_sql = _build_merge_sql(table_id, "UNNEST(@rows)", target_columns, compare_columns)
+        if debug_enabled:
+            logger.debug("Executing inline MERGE SQL with parameters rows/lb/ub:\n%s", merge_sql)
 
-        job_config = bigquery.QueryJobConfig(
-            query_parameters=[
-                bigquery.ScalarQueryParameter("lb", "TIMESTAMP", lb),
-                bigquery.ScalarQueryParameter("ub", "TIMESTAMP", ub),
-            ]
-        )
-
-        merge_job = client.query(merge_sql, job_config=job_config)
-        merge_job.result()
+        merge_job_id = _merge_sync(client, merge_sql, [_rows_parameter(df, target_table.schema), *window_params])
 
         return {
             "table": table_id,
             "rows_processed": len(df),
             "method": "merge",
-            "staging_table": staging_table_id,
-            "load_job_id": load_job.job_id,
-            "merge_job_id": merge_job.job_id,
+            "staging_table": None,
+            "load_job_id": None,
+            "merge_job_id": merge_job_id,
         }
 
-    finally:
-        client.delete_table(staging_table_id, not_found_ok=True)
+    staging_table_id, staging_created_at = _acquire_staging_table(client, table_id, target_table)
+
+    # Pin Parquet explicitly so the staging load never falls back to CSV serialization,
+    # and pass the schema so the client skips its own get_table on the staging table
+    load_job_config = bigquery.LoadJobConfig(
+        write_disposition=bigquery.WriteDisposition.WRITE_TRUNCATE,
+        source_format=bigquery.SourceFormat.PARQUET,
+        schema=target_table.schema,
+    )
+
+    load_job = client.load_table_from_dataframe(df, staging_table_id, job_config=load_job_config)
+    load_job.result()
+
+    merge_sql = _build_merge_sql(table_id, f"`{staging_table_id}`", target_columns, compare_columns)
+    if debug_enabled:
+        logger.debug("Executing MERGE SQL with parameters lb/ub:\n%s", merge_sql)
+
+    merge_job_id = _merge_sync(client, merge_sql, window_params)
+
+    # Only hand the table back after a clean run; a failed batch's table just expires
+    _staging_pool[table_id].put((staging_table_id, staging_created_at))
+
+    return {
+        "table": table_id,
+        "rows_processed": len(df),
+        "method": "merge",
+        "staging_table": staging_table_id,
+        "load_job_id": load_job.job_id,
+        "merge_job_id": merge_job_id,
+    }
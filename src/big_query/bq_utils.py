@@ -0,0 +1,130 @@
+# src/big_query/bq_utils.py
+"""Shared BigQuery client helpers for the batch insert/upsert paths."""
+
+from __future__ import annotations
+
+import logging
+from functools import lru_cache
+from threading import Lock
+from time import monotonic
+from typing import TYPE_CHECKING, Callable, Dict, Tuple, TypeVar
+
+import pandas as pd
+from google.api_core.exceptions import BadRequest
+from google.cloud import bigquery
+
+from common.logging_utils import logger
+
+if TYPE_CHECKING:
+    from google.cloud import bigquery_storage
+
+T = TypeVar("T")
+
+# Table metadata is effectively static per deployment; a short TTL still lets
+# schema changes propagate to warm instances without a redeploy.
+TABLE_CACHE_TTL_SECONDS = 300.0
+
+_table_cache: Dict[str, Tuple[float, bigquery.Table]] = {}
+_table_cache_lock = Lock()
+
+
+@lru_cache(maxsize=8)
+def get_client(project_id: str) -> bigquery.Client:
+    """Return a process-wide ``bigquery.Client`` for ``project_id``.
+
+    Client construction performs credential discovery and transport setup, so
+    warm function instances reuse a single client per project across calls.
+    """
+
+    return bigquery.Client(project=project_id)
+
+
+@lru_cache(maxsize=1)
+def get_bqstorage_client() -> bigquery_storage.BigQueryReadClient:
+    """Return a process-wide Storage Read API client for ``to_dataframe`` downloads.
+
+    Without one, every ``to_dataframe`` call builds (and tears down) its own gRPC
+    read client; sharing it keeps the channel warm across queries.
+    """
+
+    # Imported lazily: only the daily schedule reads need the gRPC storage client, so
+    # the insert/upsert paths that import this module skip it on cold start
+    from google.cloud import bigquery_storage
+
+    return bigquery_storage.BigQueryReadClient()
+
+
+def align_to_schema(df: pd.DataFrame, table: bigquery.Table) -> pd.DataFrame:
+    """Project ``df`` onto ``table``'s columns, in schema order.
+
+    Columns absent from the schema are dropped and schema columns missing from
+    ``df`` are added as all-null columns.
+    """
+
+    target_columns = [field.name for field in table.schema]
+
+    extra_columns = set(df.columns) - set(target_columns)
+    # Guard the debug log: the sorted join would be built even when DEBUG is off
+    if extra_columns and logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "Dropping columns not present in target schema: %s",
+            ", ".join(sorted(extra_columns)),
+        )
+
+    # A single reindex drops extras, adds missing columns and orders to the target
+    # schema in one pass. Added columns are cast to object so they still serialize as
+    # all-null columns (an all-NaN float column would not cast to e.g. TIMESTAMP).
+    missing_columns = [column for column in target_columns if column not in df.columns]
+    aligned = df.reindex(columns=target_columns)
+    if missing_columns:
+        aligned = aligned.astype({column: object for column in missing_columns})
+    return aligned
+
+
+def get_table_cached(client: bigquery.Client, table_id: str) -> bigquery.Table:
+    """Return ``client.get_table(table_id)``, reusing the result for a short TTL.
+
+    Errors such as ``NotFound`` propagate unchanged and are never cached.
+    """
+
+    now = monotonic()
+    with _table_cache_lock:
+        cached = _table_cache.get(table_id)
+    if cached is not None and now - cached[0] < TABLE_CACHE_TTL_SECONDS:
+        return cached[1]
+
+    table = client.get_table(table_id)
+    with _table_cache_lock:
+        _table_cache[table_id] = (now, table)
+    return table
+
+
+def invalidate_table_cache(table_id: str) -> None:
+    """Drop any cached metadata for ``table_id``."""
+
+    with _table_cache_lock:
+        _table_cache.pop(table_id, None)
+
+
+def run_with_table_refresh(
+    client: bigquery.Client,
+    table_id: str,
+    table: bigquery.Table,
+    fn: Callable[[bigquery.Table], T],
+) -> T:
+    """Run ``fn(table)``, retrying once with fresh metadata if BigQuery rejects it.
+
+    A ``BadRequest`` right after a schema change usually means the cached table
+    is stale. The cache entry is dropped and ``fn`` is retried only when the
+    refetched schema actually differs; otherwise the original error propagates.
+    """
+
+    try:
+        return fn(table)
+    except BadRequest as exc:
+        invalidate_table_cache(table_id)
+        fresh = get_table_cached(client, table_id)
+        if fresh.schema == table.schema:
+            raise
+        logger.warning("Schema for %s changed since it was cached (%s); retrying with fresh metadata", table_id, exc)
+        return fn(fresh)
@@ -11,17 +11,19 @@ Usage:
 import sys
 import json
 import argparse
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Optional, List
 import pandas as pd
 import pytz
 import os
+from concurrent.futures import ThreadPoolExecutor
 from google.cloud import bigquery
 
 from common.logging_utils import logger
 from schemas.common.schema_registry import get_schema_class
 from schemas.common.schema_utils import clean_and_validate_dataframe
 from big_query.batch_insert import insert_batch
+from big_query.bq_utils import get_bqstorage_client, get_client
 
 
 def get_globals():
@@ -47,32 +49,34 @@ def get_globals():
     }
 
 
-def convert_gtfs_time_to_utc(service_date: int, time_str: str) -> Optional[datetime]:
-    """Convert GTFS time string (HH:MM:SS) to UTC datetime, handling times > 24:00"""
-    if not time_str or pd.isna(time_str):
-        return None
-
-    # Parse the time string
-    hours, minutes, seconds = map(int, time_str.split(':'))
+def convert_gtfs_times_to_utc(service_date: int, time_strs: pd.Series) -> pd.Series:
+    """Convert GTFS time strings (HH:MM:SS) to UTC timestamps, handling times > 24:00.
 
-    # Calculate days to add (for times > 24:00)
-    extra_days = hours // 24
-    hours = hours % 24
-
-    # Create base datetime for service date
-    base_date = datetime(service_date // 10000, (service_date % 10000) // 100, service_date % 100)
+    Vectorized over the whole column: blank or malformed times become NaT.
+    """
+    # Parse the time strings into total seconds past service-day midnight
+    parts = time_strs.astype("string").str.strip().str.split(":", expand=True)
+    if parts.shape[1] < 3:
+        return pd.Series(pd.NaT, index=time_strs.index, dtype="datetime64[ns, UTC]")
+    hours, minutes, seconds = (pd.to_numeric(parts[i], errors="coerce") for i in range(3))
+    total_seconds = hours * 3600 + minutes * 60 + seconds
 
-    # Add the time
-    dt = base_date + timedelta(days=extra_days, hours=hours, minutes=minutes, seconds=seconds)
+    # Create base datetime for service date and add the time (extra days for times > 24:00)
+    base_date = pd.Timestamp(service_date // 10000, (service_date % 10000) // 100, service_date % 100)
+    local_times = base_date + pd.to_timedelta(total_seconds, unit="s")
 
-    # Assume local timezone (adjust based on your GTFS feed's timezone)
-    local_tz = pytz.timezone('Pacific/Auckland')
-    dt_local = local_tz.localize(dt)
+    # Assume local timezone (adjust based on your GTFS feed's timezone). Ambiguous times
+    # take standard time and times in the spring-forward gap shift forward an hour,
+    # matching pytz localize() defaults.
+    return local_times.dt.tz_localize(
+        "Pacific/Auckland", ambiguous=False, nonexistent=pd.Timedelta(hours=1)
+    ).dt.tz_convert("UTC")
 
-    # Convert to UTC
-    dt_utc = dt_local.astimezone(pytz.UTC)
 
-    return dt_utc
+def _epoch_seconds(timestamps: pd.Series) -> pd.Series:
+    """Whole epoch seconds for UTC timestamps as nullable Int64."""
+    seconds = (timestamps - pd.Timestamp(0, tz="UTC")) // pd.Timedelta(seconds=1)
+    return seconds.astype("Int64")
 
 
 def get_applicable_feed_hash(client, project_id: str, dataset: str, service_date: int) -> Optional[str]:
@@ -87,13 +91,14 @@ def get_applicable_feed_hash(client, project_id: str, dataset: str, service_date
     """
 
     try:
-        feed_df = client.query(query).to_dataframe()
+        # A single-row lookup: iterate the result instead of building a DataFrame
+        row = next(iter(client.query(query).result()), None)
 
-        if feed_df.empty:
+        if row is None:
             logger.warning(f"No applicable feed found for date {service_date}")
             return None
 
-        feed_hash = feed_df.iloc[0]['feed_hash']
+        feed_hash = row.feed_hash
         logger.info(f"Found feed hash: {feed_hash}")
         return feed_hash
 
@@ -111,33 +116,30 @@ def get_active_services(client, project_id: str, dataset: str, feed_hash: str, s
     day_name = date_obj.strftime('%A').lower()
 
     try:
-        # Get regular services
-        calendar_query = f"""
-        SELECT service_id FROM `{project_id}.{dataset}.stg_calendar`
-        WHERE feed_hash = '{feed_hash}'
-        AND start_date <= {service_date} AND end_date >= {service_date}
+        # Regular (calendar), added (exception_type = 1) and removed (exception_type = 2)
+        # services in one job, tagged by source; day_name is a fixed weekday column name
+        services_query = f"""
+        SELECT service_id, 'regular' AS source FROM `{project_id}.{dataset}.stg_calendar`
+        WHERE feed_hash = @feed_hash
+        AND start_date <= @service_date AND end_date >= @service_date
         AND {day_name} = 1
+        UNION ALL
+        SELECT service_id, IF(exception_type = 1, 'added', 'removed') AS source
+        FROM `{project_id}.{dataset}.stg_calendar_dates`
+        WHERE feed_hash = @feed_hash
+        AND date = @service_date AND exception_type IN (1, 2)
         """
-        calendar_df = client.query(calendar_query).to_dataframe()
-        regular_services = set(calendar_df['service_id'].tolist())
-
-        # Get added services (exception_type = 1)
-        added_query = f"""
-        SELECT service_id FROM `{project_id}.{dataset}.stg_calendar_dates`
-        WHERE feed_hash = '{feed_hash}'
-        AND date = {service_date} AND exception_type = 1
-        """
-        added_df = client.query(added_query).to_dataframe()
-        added_services = set(added_df['service_id'].tolist())
-
-        # Get removed services (exception_type = 2)
-        removed_query = f"""
-        SELECT service_id FROM `{project_id}.{dataset}.stg_calendar_dates`
-        WHERE feed_hash = '{feed_hash}'
-        AND date = {service_date} AND exception_type = 2
-        """
-        removed_df = client.query(removed_query).to_dataframe()
-        removed_services = set(removed_df['service_id'].tolist())
+        job_config = bigquery.QueryJobConfig(query_parameters=[
+            bigquery.ScalarQueryParameter("feed_hash", "STRING", feed_hash),
+            bigquery.ScalarQueryParameter("service_date", "INT64", service_date),
+        ])
+
+        services_by_source = {"regular": set(), "added": set(), "removed": set()}
+        for row in client.query(services_query, job_config=job_config).result():
+            services_by_source[row.source].add(row.service_id)
+        regular_services = services_by_source["regular"]
+        added_services = services_by_source["added"]
+        removed_services = services_by_source["removed"]
 
         # Combine: (regular + added) - removed
         active_services = (regular_services | added_services) - removed_services
@@ -160,7 +162,7 @@ def get_trips(client, project_id: str, dataset: str, feed_hash: str, active_serv
         return pd.DataFrame()
 
     try:
-        # Get ALL trips for this feed (no filtering in SQL)
+        # Filter to the active services in SQL so only the day's trips leave BigQuery
         trips_query = f"""
         SELECT
             t.service_id, t.route_id, r.route_short_name, r.route_type,
@@ -168,14 +170,18 @@ def get_trips(client, project_id: str, dataset: str, feed_hash: str, active_serv
         FROM `{project_id}.{dataset}.stg_trips` t
         LEFT JOIN `{project_id}.{dataset}.stg_routes` r
         ON t.route_id = r.route_id AND t.feed_hash = r.feed_hash
-        WHERE t.feed_hash = '{feed_hash}'
+        WHERE t.feed_hash = @feed_hash
+        AND t.service_id IN UNNEST(@services)
         """
-        all_trips_df = client.query(trips_query).to_dataframe()
-
-        # Filter by active services in pandas
-        trips_df = all_trips_df[all_trips_df['service_id'].isin(active_services)]
+        job_config = bigquery.QueryJobConfig(query_parameters=[
+            bigquery.ScalarQueryParameter("feed_hash", "STRING", feed_hash),
+            bigquery.ArrayQueryParameter("services", "STRING", list(active_services)),
+        ])
+        trips_df = client.query(trips_query, job_config=job_config).to_dataframe(
+            bqstorage_client=get_bqstorage_client()
+        )
 
-        logger.info(f"All trips: {len(all_trips_df)}, Filtered: {len(trips_df)}")
+        logger.info(f"Trips for active services: {len(trips_df)}")
         return trips_df
 
     except Exception as e:
@@ -183,48 +189,86 @@ def get_trips(client, project_id: str, dataset: str, feed_hash: str, active_serv
         return pd.DataFrame()
 
 
-def get_stop_times_and_convert(client, project_id: str, dataset: str, feed_hash: str,
-                              trips_df: pd.DataFrame, service_date: int) -> pd.DataFrame:
-    """Get stop times and convert to UTC format."""
-    logger.info("Getting stop times and converting times...")
+def get_stop_times(client, project_id: str, dataset: str, feed_hash: str,
+                   active_services: List[str]) -> pd.DataFrame:
+    """Get stop times (with stop details) for trips of the active services."""
+    logger.info("Getting stop times...")
 
-    if trips_df.empty:
-        logger.warning("No trips data provided")
+    if not active_services:
+        logger.warning("No active services provided")
         return pd.DataFrame()
 
     try:
-        # Get ALL stop times for this feed (no filtering in SQL)
+        # Only fetch stop times of the active trips, filtered before the stops join so
+        # BigQuery joins the day's slice instead of the whole feed. The trip filter is a
+        # semi-join on stg_trips by service rather than a trip_id list, so BigQuery
+        # hash-joins it however many trips run that day.
         stop_times_query = f"""
+        WITH active_st AS (
+            SELECT
+                trip_id, stop_id, stop_sequence, stop_headsign,
+                arrival_time, departure_time, shape_dist_traveled
+            FROM `{project_id}.{dataset}.stg_stop_times`
+            WHERE feed_hash = @feed_hash
+            AND trip_id IN (
+                SELECT trip_id FROM `{project_id}.{dataset}.stg_trips`
+                WHERE feed_hash = @feed_hash AND service_id IN UNNEST(@services)
+            )
+        ),
+        feed_stops AS (
+            SELECT stop_id, stop_code, stop_name, stop_lat, stop_lon
+            FROM `{project_id}.{dataset}.stg_stops`
+            WHERE feed_hash = @feed_hash
+        )
         SELECT
             st.trip_id, st.stop_id, st.stop_sequence, s.stop_code, s.stop_name,
             st.stop_headsign, st.arrival_time, st.departure_time,
             s.stop_lat, s.stop_lon, st.shape_dist_traveled
-        FROM `{project_id}.{dataset}.stg_stop_times` st
-        LEFT JOIN `{project_id}.{dataset}.stg_stops` s
-        ON st.stop_id = s.stop_id AND st.feed_hash = s.feed_hash
-        WHERE st.feed_hash = '{feed_hash}'
+        FROM active_st st
+        LEFT JOIN feed_stops s
+        ON st.stop_id = s.stop_id
         """
-        stop_times_df = client.query(stop_times_query).to_dataframe()
+        job_config = bigquery.QueryJobConfig(query_parameters=[
+            bigquery.ScalarQueryParameter("feed_hash", "STRING", feed_hash),
+            bigquery.ArrayQueryParameter("services", "STRING", list(active_services)),
+        ])
+        stop_times_df = client.query(stop_times_query, job_config=job_config).to_dataframe(
+            bqstorage_client=get_bqstorage_client()
+        )
 
         # Rename raw GTFS time strings to scheduled_*_time
-        stop_times_df = stop_times_df.rename(columns={
+        return stop_times_df.rename(columns={
             'arrival_time': 'scheduled_arrival_time',
             'departure_time': 'scheduled_departure_time'
         })
 
+    except Exception as e:
+        logger.error(f"Error getting stop times: {e}")
+        return pd.DataFrame()
+
+
+def convert_stop_times(stop_times_df: pd.DataFrame, trips_df: pd.DataFrame, service_date: int) -> pd.DataFrame:
+    """Convert stop times to UTC format and join them with trips."""
+    logger.info("Converting stop times...")
+
+    if trips_df.empty:
+        logger.warning("No trips data provided")
+        return pd.DataFrame()
+
+    if stop_times_df.empty:
+        logger.warning("No stop times data provided")
+        return pd.DataFrame()
+
+    try:
         # Convert scheduled times to UTC timestamps and seconds
-        stop_times_df['scheduled_arrival'] = stop_times_df['scheduled_arrival_time'].apply(
-            lambda x: convert_gtfs_time_to_utc(service_date, x)
-        )
-        stop_times_df['scheduled_departure'] = stop_times_df['scheduled_departure_time'].apply(
-            lambda x: convert_gtfs_time_to_utc(service_date, x)
+        stop_times_df['scheduled_arrival'] = convert_gtfs_times_to_utc(
+            service_date, stop_times_df['scheduled_arrival_time']
         )
-        stop_times_df['scheduled_arrival_s'] = stop_times_df['scheduled_arrival'].apply(
-            lambda x: int(x.timestamp()) if x else None
-        )
-        stop_times_df['scheduled_departure_s'] = stop_times_df['scheduled_departure'].apply(
-            lambda x: int(x.timestamp()) if x else None
+        stop_times_df['scheduled_departure'] = convert_gtfs_times_to_utc(
+            service_date, stop_times_df['scheduled_departure_time']
         )
+        stop_times_df['scheduled_arrival_s'] = _epoch_seconds(stop_times_df['scheduled_arrival'])
+        stop_times_df['scheduled_departure_s'] = _epoch_seconds(stop_times_df['scheduled_departure'])
 
         # Join with trips data
         schedule_df = stop_times_df.merge(trips_df, on='trip_id', how='inner')
@@ -233,7 +277,7 @@ def get_stop_times_and_convert(client, project_id: str, dataset: str, feed_hash:
         return schedule_df
 
     except Exception as e:
-        logger.error(f"Error getting stop times: {e}")
+        logger.error(f"Error converting stop times: {e}")
         return pd.DataFrame()
 
 def run(request):
@@ -254,8 +298,8 @@ def run(request):
     logger.info(f"Using service date: {service_date} in timezone {timezone}")
 
     try:
-        # Set up BigQuery client
-        client = bigquery.Client(project=config['project_id'])
+        # Set up BigQuery client (cached per project across warm invocations)
+        client = get_client(config['project_id'])
 
         # Step 1: Get feed hash
         feed_hash = get_applicable_feed_hash(client, config['project_id'], config['bq_dataset'], service_date)
@@ -268,13 +312,20 @@ def run(request):
         if not active_services:
             logger.warning("No active services found")
 
-        # Step 3: Get trips
-        trips_df = get_trips(client, config['project_id'], config['bq_dataset'], feed_hash, active_services)
-
-        # Step 4: Get stop times and convert
-        schedule_df = get_stop_times_and_convert(
-            client, config['project_id'], config['bq_dataset'], feed_hash, trips_df, service_date
-        )
+        # Step 3: Get trips and stop times. Both only depend on the active services,
+        # so the two BigQuery jobs run side by side rather than back to back.
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            trips_future = executor.submit(
+                get_trips, client, config['project_id'], config['bq_dataset'], feed_hash, active_services
+            )
+            stop_times_future = executor.submit(
+                get_stop_times, client, config['project_id'], config['bq_dataset'], feed_hash, active_services
+            )
+            trips_df = trips_future.result()
+            stop_times_df = stop_times_future.result()
+
+        # Step 4: Convert stop times and join with trips
+        schedule_df = convert_stop_times(stop_times_df, trips_df, service_date)
 
         # Step 5: Build final schedule
         schedule_df['service_date'] = service_date
@@ -1,14 +1,16 @@
 #  Moved from tasks_enqueuer/main.py (package renamed to enqueuer)
 from __future__ import annotations
-import os, json
-from typing import Optional
+import os, json, time
+from typing import Dict, Optional, Tuple
 import urllib.request
 from datetime import datetime, timedelta, timezone
 from google.cloud import tasks_v2
 import google.auth
 from google.auth.transport import requests as auth_requests
+from google.auth import jwt
 from google.oauth2 import id_token
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from google.protobuf import timestamp_pb2
 
 def _env(name: str, default: Optional[str] = None) -> str:
@@ -22,6 +24,23 @@ def _env(name: str, default: Optional[str] = None) -> str:
 def _minute_base(now: datetime) -> datetime:
     return now.replace(second=0, microsecond=0)
 
+# Upper bound on concurrent create_task RPCs, independent of how many OFFSETS are configured
+_CREATE_TASK_WORKERS = 8
+
+# ID tokens live ~1h; warm instances reuse one per audience until 5 min before expiry
+_ID_TOKEN_CACHE: Dict[str, Tuple[str, float]] = {}
+_ID_TOKEN_MIN_TTL = 300
+
+def _worker_id_token(auth_req, audience: str) -> str:
+    cached = _ID_TOKEN_CACHE.get(audience)
+    if cached and cached[1] - time.time() > _ID_TOKEN_MIN_TTL:
+        return cached[0]
+    token = id_token.fetch_id_token(auth_req, audience)
+    # Only the exp claim is read here; the worker verifies the signature
+    exp = jwt.decode(token, verify=False).get("exp", 0)
+    _ID_TOKEN_CACHE[audience] = (token, float(exp))
+    return token
+
 def enqueue(request):
     req_payload = {}
     try:
@@ -73,14 +92,19 @@ def enqueue(request):
     # Pre-mint an ID token for the worker (avoid Cloud Tasks OIDC token block => no actAs requirement on create_task)
     auth_req = auth_requests.Request()
     try:
-        worker_id_token = id_token.fetch_id_token(auth_req, worker_url)
+        worker_id_token = _worker_id_token(auth_req, worker_url)
     except Exception as e:
         print(f"ID token fetch failed: {e}", file=sys.stderr)
         worker_id_token = None
     now = datetime.now(timezone.utc)
     base = _minute_base(now)
-    created = 0
+    tasks = []
     grace = timedelta(seconds=2)
+    # Headers and body are identical for every offset; build them once
+    headers = {"Content-Type": "application/json"}
+    if worker_id_token:
+        headers["Authorization"] = f"Bearer {worker_id_token}"
+    body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
     for off in offsets:
         scheduled = base + timedelta(seconds=off)
         # Allow small startup delay; only skip if we're more than grace past the intended time.
@@ -90,9 +114,13 @@ def enqueue(request):
         if scheduled < now:
             scheduled = now + timedelta(milliseconds=500)
         ts = timestamp_pb2.Timestamp(); ts.FromDatetime(scheduled)
-        headers = {"Content-Type": "application/json"}
-        if worker_id_token:
-            headers["Authorization"] = f"Bearer {worker_id_token}"
-        task = {"http_request": {"http_method": tasks_v2.HttpMethod.POST, "url": worker_url, "headers": headers, "body": json.dumps(payload).encode("utf-8")}, "schedule_time": ts}
-        client.create_task(request={"parent": parent, "task": task}); created += 1
+        task = {"http_request": {"http_method": tasks_v2.HttpMethod.POST, "url": worker_url, "headers": headers, "body": body}, "schedule_time": ts}
+        tasks.append(task)
+    # Each create_task is an independent RPC; issue them together instead of paying a round trip per task
+    created = 0
+    if tasks:
+        with ThreadPoolExecutor(max_workers=min(len(tasks), _CREATE_TASK_WORKERS)) as pool:
+            futures = [pool.submit(client.create_task, request={"parent": parent, "task": t}) for t in tasks]
+            for f in futures:
+                f.result(); created += 1
     return ({"status": "ok", "created": created, "queue": queue_name, "location": location}, 200, {"Content-Type": "application/json"})
@@ -37,7 +37,9 @@ def parse_protobuf_to_bytes(proto_bytes):
         feed = gtfs_realtime_pb2.FeedMessage()
         feed.ParseFromString(proto_bytes)
         feed_dict = MessageToDict(feed)
-        return json.dumps(feed_dict).encode('utf-8')
+        # Compact separators: the payload is machine-read only, so the default
+        # ", "/": " padding is wasted bytes to encode, gzip and parse downstream
+        return json.dumps(feed_dict, separators=(',', ':')).encode('utf-8')
     
     except DecodeError as e:
         logger.error(f"Failed to decode protobuf data: {e}")
@@ -73,7 +75,7 @@ def process_response(response, response_type):
         return parse_protobuf_to_bytes(response.content)
     
     elif response_type == 'json':
-        return json.dumps(response.json()).encode('utf-8')
+        return json.dumps(response.json(), separators=(',', ':')).encode('utf-8')
     
     elif response_type == 'zip':
         return response.content
@@ -1,8 +1,9 @@
 # Library imports
-import io
 import gzip
 from typing import Dict, Any, Optional
 from datetime import datetime, timezone
+from functools import lru_cache
+from google.api_core.exceptions import PreconditionFailed
 from google.cloud import storage
 import hashlib
 
@@ -21,6 +22,25 @@ EXT_MAP = {
     "zip": "zip",
 }
 
+# Payloads at least this large are gzipped straight into a resumable upload stream
+# rather than compressed into a second in-memory copy first. Smaller payloads keep
+# the single-request upload, which is faster than a resumable session.
+STREAM_UPLOAD_THRESHOLD = 8 * 1024 * 1024
+STREAM_UPLOAD_CHUNK_SIZE = 4 * 1024 * 1024
+
+
+@lru_cache(maxsize=4)
+def get_storage_client(project: Optional[str] = None) -> storage.Client:
+    """Return a process-wide GCS client, reused across warm invocations.
+
+    Args:
+        project: Optional project override; ``None`` uses the ambient default.
+
+    Returns:
+        A cached ``storage.Client`` instance.
+    """
+    return storage.Client(project=project)
+
 
 def ts_parts(ts: datetime) -> Dict[str, str]:
     """Break a UTC timestamp into formatted parts for path construction.
@@ -93,13 +113,19 @@ def gzip_bytes(data: bytes, level: int = 6) -> bytes:
     Returns:
         Compressed bytes.
     """
-    buf = io.BytesIO()
-    with gzip.GzipFile(fileobj=buf, mode="wb", compresslevel=level, mtime=0) as gz:
-        gz.write(data)
-    return buf.getvalue()
+    # One-shot compress writes straight into the result instead of via a BytesIO copy
+    return gzip.compress(data, compresslevel=level, mtime=0)
 
 
-def upload_gcs(bucket: str, object_name: str, data_bytes: bytes, content_type: str, gzipped: bool, metadata: Optional[Dict[str, str]] = None):
+def upload_gcs(
+    bucket: str,
+    object_name: str,
+    data_bytes: bytes,
+    content_type: str,
+    gzipped: bool,
+    metadata: Optional[Dict[str, str]] = None,
+    if_generation_match: Optional[int] = None,
+):
     """Upload a byte payload to GCS.
 
     Args:
@@ -109,15 +135,45 @@ def upload_gcs(bucket: str, object_name: str, data_bytes: bytes, content_type: s
         content_type: MIME type for the object.
         gzipped: Whether the bytes are gzip-compressed (sets content_encoding="gzip").
         metadata: Optional dict of custom metadata to attach to the object.
+        if_generation_match: Optional generation precondition; ``0`` only creates
+            the object if it does not exist yet (raises ``PreconditionFailed``).
     """
-    client = storage.Client()
+    client = get_storage_client()
     blob = client.bucket(bucket).blob(object_name)
     blob.cache_control = "no-store"
     if gzipped:
         blob.content_encoding = "gzip"
     if metadata:
         blob.metadata = metadata
-    blob.upload_from_string(data_bytes, content_type=content_type)
+    blob.upload_from_string(data_bytes, content_type=content_type, if_generation_match=if_generation_match)
+
+
+def upload_gcs_gzip_stream(bucket: str, object_name: str, data: bytes, content_type: str, level: int = 6):
+    """Gzip ``data`` directly into a GCS upload stream.
+
+    Peak memory stays near one copy of the payload since compressed chunks are
+    sent as they fill instead of being buffered as a whole gzipped object.
+
+    Args:
+        bucket: Destination GCS bucket name.
+        object_name: Full object path inside the bucket.
+        data: Raw (uncompressed) bytes to compress and upload.
+        content_type: MIME type for the object.
+        level: gzip compression level (1-9).
+    """
+    client = get_storage_client()
+    blob = client.bucket(bucket).blob(object_name)
+    blob.cache_control = "no-store"
+    blob.content_encoding = "gzip"
+    # GzipFile flushes its target on close; ignore_flush lets the writer accept that
+    with blob.open(
+        "wb",
+        content_type=content_type,
+        chunk_size=STREAM_UPLOAD_CHUNK_SIZE,
+        ignore_flush=True,
+    ) as out:
+        with gzip.GzipFile(fileobj=out, mode="wb", compresslevel=level, mtime=0) as gz:
+            gz.write(data)
 
 
 def upload_data_response(
@@ -148,8 +204,6 @@ def upload_data_response(
     parts = ts_parts(capture_ts)
 
     gzipped = response_type != "zip"
-    if gzipped:
-        data = gzip_bytes(data)
 
     content_type = CONTENT_TYPE_MAP.get(response_type, "application/octet-stream")
     object_name = build_object_name(
@@ -161,7 +215,12 @@ def upload_data_response(
         use_cache_prefix=use_cache_prefix,
     )
 
-    upload_gcs(bucket, object_name, data, content_type, gzipped)
+    if gzipped and len(data) >= STREAM_UPLOAD_THRESHOLD:
+        upload_gcs_gzip_stream(bucket, object_name, data, content_type)
+    else:
+        if gzipped:
+            data = gzip_bytes(data)
+        upload_gcs(bucket, object_name, data, content_type, gzipped)
     return object_name
 
 
@@ -193,49 +252,41 @@ def upload_schedule_response(
     """
     capture_ts = datetime.now(timezone.utc)
     year = capture_ts.strftime("%Y")
-    hash_hex = hashlib.md5(zip_bytes).hexdigest()
+    # Content fingerprint for dedup only; usedforsecurity=False keeps MD5 usable on
+    # FIPS-restricted OpenSSL builds. The hash doubles as feed_hash in BigQuery, so
+    # the algorithm is kept stable.
+    hash_hex = hashlib.md5(zip_bytes, usedforsecurity=False).hexdigest()
 
     hashed_object_name = f"{spec}-{dataset}/year={year}/{hash_hex}.zip"
     latest_object_name = f"{spec}-{dataset}/latest.zip"
 
-    # Existence check (avoid re-uploading identical content)
-    client = storage.Client()
-    if client.bucket(bucket).blob(hashed_object_name).exists():
-        logger.info(f"GTFS static feed unchanged (hash={hash_hex})")
-        return hashed_object_name, hash_hex, False
-
     meta = {"hash": hash_hex, "captured": capture_ts.isoformat()}
 
-    # Upload hashed object
-    upload_gcs(
-        bucket=bucket,
-        object_name=hashed_object_name,
-        data_bytes=zip_bytes,
-        content_type="application/zip",
-        gzipped=False,
-        metadata=meta,
-    )
-
-    # Upload / overwrite latest pointer
-    upload_gcs(
-        bucket=bucket,
-        object_name=latest_object_name,
-        data_bytes=zip_bytes,
-        content_type="application/zip",
-        gzipped=False,
-        metadata=meta,
-    )
-
-    cache_object_name: Optional[str] = None
-    if use_cache_prefix:
-        cache_object_name = f"{spec}-{dataset}/cache/year={year}/{hash_hex}.zip"
+    # Upload hashed object with a create-only precondition, which doubles as the
+    # dedup check: if this content is already stored, GCS rejects the write.
+    try:
         upload_gcs(
             bucket=bucket,
-            object_name=cache_object_name,
+            object_name=hashed_object_name,
             data_bytes=zip_bytes,
             content_type="application/zip",
             gzipped=False,
             metadata=meta,
+            if_generation_match=0,
         )
+    except PreconditionFailed:
+        logger.info(f"GTFS static feed unchanged (hash={hash_hex})")
+        return hashed_object_name, hash_hex, False
+
+    # Latest pointer and cache copy are server-side copies of the hashed object, so
+    # the ZIP body is only sent once. Copies carry over content type and metadata.
+    gcs_bucket = get_storage_client().bucket(bucket)
+    hashed_blob = gcs_bucket.blob(hashed_object_name)
+    gcs_bucket.copy_blob(hashed_blob, gcs_bucket, new_name=latest_object_name)
+
+    cache_object_name: Optional[str] = None
+    if use_cache_prefix:
+        cache_object_name = f"{spec}-{dataset}/cache/year={year}/{hash_hex}.zip"
+        gcs_bucket.copy_blob(hashed_blob, gcs_bucket, new_name=cache_object_name)
 
     return (cache_object_name or hashed_object_name), hash_hex, True
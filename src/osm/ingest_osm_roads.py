@@ -20,7 +20,6 @@ Auth:
 from __future__ import annotations
 
 import argparse
-from typing import List, Dict
 
 from google.cloud import bigquery
 
@@ -77,21 +76,10 @@ def run_ingest(project: str, dataset: str, temp_table: str, final_table: str) ->
 
   print(f"Running public dataset query in location {source_location} to fetch OSM roads subset…")
   query_job = client.query(query, job_config=job_config, location=source_location)
-  rows_iter = query_job.result()
-  # Materialize results in client and convert Row objects to plain dicts for JSON load
-  rows = [
-    {
-      "edge_id": r["edge_id"],
-      "name": r["name"],
-      "highway": r["highway"],
-      "oneway": r["oneway"],
-      "maxspeed": r["maxspeed"],
-      "length_m": r["length_m"],
-      "wkt": r["wkt"],
-    }
-    for r in rows_iter
-  ]
-  print(f"Fetched {len(rows)} rows from public OSM dataset.")
+  # Pull the result set as a columnar DataFrame (Storage Read API when available)
+  # instead of iterating Row objects into per-row dicts
+  df = query_job.to_dataframe()
+  print(f"Fetched {len(df)} rows from public OSM dataset.")
 
   # Step 2: Load into AU staging table with WKT geometry
   temp_table_id = f"{project}.{dataset}.{temp_table}"
@@ -105,11 +93,15 @@ def run_ingest(project: str, dataset: str, temp_table: str, final_table: str) ->
     bigquery.SchemaField("wkt", "STRING"),
   ]
 
-  print(f"Loading {len(rows)} rows into staging table {temp_table_id}…")
-  load_job = client.load_table_from_json(
-    rows,
+  print(f"Loading {len(df)} rows into staging table {temp_table_id}…")
+  load_job = client.load_table_from_dataframe(
+    df[[field.name for field in schema]],
     destination=temp_table_id,
-    job_config=bigquery.LoadJobConfig(schema=schema, write_disposition="WRITE_TRUNCATE"),
+    job_config=bigquery.LoadJobConfig(
+      schema=schema,
+      write_disposition="WRITE_TRUNCATE",
+      source_format=bigquery.SourceFormat.PARQUET,
+    ),
   )
   load_job.result()
   print("Staging load complete.")
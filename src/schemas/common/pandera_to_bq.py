@@ -27,8 +27,31 @@ except Exception as e:
     raise SystemExit("pandera and pandas are required. Install with `pip install pandera[pandas]`. ") from e
 
 
+# Exact matches for the dtype spellings the schemas actually use; anything else
+# falls through to the substring heuristics below
+_EXACT_BQ_TYPES = {
+    "int64": "INT64",
+    "int32": "INT64",
+    "float64": "FLOAT",
+    "float32": "FLOAT",
+    "bool": "BOOL",
+    "boolean": "BOOL",
+    "str": "STRING",
+    "string": "STRING",
+    "object": "STRING",
+    "category": "STRING",
+    "datetime64[ns]": "TIMESTAMP",
+    "datetime64[ns, utc]": "TIMESTAMP",
+    "date": "DATE",
+    "time": "TIME",
+}
+
+
 def bq_type(dtype: object) -> str:
     s = (str(dtype) or "").lower()
+    exact = _EXACT_BQ_TYPES.get(s)
+    if exact is not None:
+        return exact
     if "int" in s:
         return "INT64"
     if any(x in s for x in ("float", "decimal", "numeric")):
@@ -107,9 +130,13 @@ def main() -> None:
                 table_cfg["clustering"] = {"fields": list(clustering)}
 
             out_file = out_dir / f"{base_name}.table.json"
-            with out_file.open("w", encoding="utf-8") as f:
-                json.dump(table_cfg, f, indent=2)
-                f.write("\n")
+            payload = json.dumps(table_cfg, indent=2) + "\n"
+            # Leave unchanged files untouched so reruns are a read-only scan and
+            # downstream tooling keyed on mtime does not see spurious changes
+            if out_file.is_file() and out_file.read_text(encoding="utf-8") == payload:
+                print(f"unchanged {out_file}")
+                continue
+            out_file.write_text(payload, encoding="utf-8")
             print(f"wrote {out_file}")
 
 
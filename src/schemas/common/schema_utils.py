@@ -8,12 +8,31 @@ Utility functions for working with pandera schemas and DataFrames.
 import pandas as pd
 import numpy as np
 import hashlib
-from typing import Dict, Any, List, Optional, Iterable
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Iterable, Tuple
 import importlib
 
 from common.logging_utils import logger
 
 
+_MISSING = object()
+
+
+@lru_cache(maxsize=256)
+def _lookup_schema_attribute(schema_class, attribute_name):
+    """
+    Resolve an attribute from the schema module, or ``_MISSING`` if absent.
+    Schema module constants are static, so each lookup is resolved once per process.
+    """
+    try:
+        module = importlib.import_module(schema_class.__module__)
+        return getattr(module, attribute_name, _MISSING)
+    except ImportError:
+        logger.warning(f"Could not import schema module {schema_class.__module__}")
+
+    return _MISSING
+
+
 def _get_schema_attribute(schema_class, attribute_name, default=None):
     """
     Get an attribute from the schema module.
@@ -26,14 +45,56 @@ def _get_schema_attribute(schema_class, attribute_name, default=None):
     Returns:
         Attribute value or default
     """
-    try:
-        module = importlib.import_module(schema_class.__module__)
-        if hasattr(module, attribute_name):
-            return getattr(module, attribute_name)
-    except ImportError:
-        logger.warning(f"Could not import schema module {schema_class.__module__}")
+    value = _lookup_schema_attribute(schema_class, attribute_name)
+    return default if value is _MISSING else value
+
+
+@lru_cache(maxsize=64)
+def _float_precision_fields(schema_class) -> Tuple[Tuple[str, int], ...]:
+    """
+    Resolve (field, precision) pairs for float fields with precision metadata.
+    Cached per schema class so the dtype dispatch runs once rather than per batch.
+
+    Args:
+        schema_class: Pandera DataFrameModel class with precision metadata
 
-    return default
+    Returns:
+        Tuple of (field_name, precision) pairs in schema order
+    """
+    fields = []
+    for field_name, field_config in schema_class.to_schema().columns.items():
+        if (field_config.dtype == 'float64' or field_config.dtype == 'float32' or
+            str(field_config.dtype).startswith('float')):
+            precision = field_config.metadata.get('precision') if field_config.metadata else None
+            if precision is not None:
+                fields.append((field_name, precision))
+    return tuple(fields)
+
+
+@lru_cache(maxsize=64)
+def _integer_fields(schema_class) -> Tuple[str, ...]:
+    """
+    Resolve the integer-typed fields of a schema (plain or nullable Int64).
+    Cached per schema class so the dtype dispatch runs once rather than per batch.
+
+    Args:
+        schema_class: Pandera DataFrameModel class
+
+    Returns:
+        Tuple of integer field names in schema order
+    """
+    int_cols = []
+    for col_name, col_schema in schema_class.to_schema().columns.items():
+        dtype = getattr(col_schema, "dtype", None)
+        if dtype is None:
+            continue
+        alias = getattr(dtype, "str_alias", None)
+        dtypes_to_check = [str(dtype).lower()]
+        if alias is not None:
+            dtypes_to_check.append(str(alias).lower())
+        if any(s.startswith("int") for s in dtypes_to_check):
+            int_cols.append(col_name)
+    return tuple(int_cols)
 
 
 def apply_schema_field_mappings(df: pd.DataFrame, schema_class) -> pd.DataFrame:
@@ -58,8 +119,8 @@ def apply_schema_field_mappings(df: pd.DataFrame, schema_class) -> pd.DataFrame:
         return df
     schema_instance = schema_class.to_schema()
 
-    # Start with a copy of the original DataFrame
-    result_df = df.copy()
+    # Start with a shallow copy; columns are only ever replaced, never written in place
+    result_df = df.copy(deep=False)
 
     # Track which target columns have been created
     target_columns = set()
@@ -76,7 +137,7 @@ def apply_schema_field_mappings(df: pd.DataFrame, schema_class) -> pd.DataFrame:
 
         if source_column:
             # Create the target column by copying from source
-            result_df[target_field] = df[source_column].copy()
+            result_df[target_field] = df[source_column]
             target_columns.add(target_field)
             logger.debug(f"Mapped {source_column} -> {target_field}")
 
@@ -103,7 +164,7 @@ def convert_epoch_timestamps_to_utc(df: pd.DataFrame) -> pd.DataFrame:
     if df.empty:
         return df
 
-    result_df = df.copy()
+    result_df = df.copy(deep=False)
 
     # Find all columns ending with '_s' (epoch timestamps)
     epoch_columns = [col for col in df.columns if col.endswith('_s')]
@@ -145,30 +206,21 @@ def apply_schema_precision_rounding(df: pd.DataFrame, schema_class) -> pd.DataFr
     if df.empty:
         return df
 
-    result_df = df.copy()
-    schema_instance = schema_class.to_schema()
+    result_df = df.copy(deep=False)
 
-    # Process each field in the schema
-    for field_name, field_config in schema_instance.columns.items():
+    # Process each float field that declares a precision
+    for field_name, precision in _float_precision_fields(schema_class):
         # Check if this field exists in the DataFrame
         if field_name not in df.columns:
             continue
 
-        # Check if this is a float field with precision metadata
-        if (field_config.dtype == 'float64' or field_config.dtype == 'float32' or
-            str(field_config.dtype).startswith('float')):
-
-            # Get precision from metadata
-            precision = field_config.metadata.get('precision') if field_config.metadata else None
-
-            if precision is not None:
-                try:
-                    # Round the column to the specified precision
-                    result_df[field_name] = pd.to_numeric(result_df[field_name], errors='coerce').round(precision)
+        try:
+            # Round the column to the specified precision
+            result_df[field_name] = pd.to_numeric(result_df[field_name], errors='coerce').round(precision)
 
-                    logger.debug(f"Rounded {field_name} to {precision} decimal places")
-                except Exception as e:
-                    logger.warning(f"Failed to round {field_name} to {precision} decimal places: {e}")
+            logger.debug(f"Rounded {field_name} to {precision} decimal places")
+        except Exception as e:
+            logger.warning(f"Failed to round {field_name} to {precision} decimal places: {e}")
 
     return result_df
 
@@ -188,7 +240,7 @@ def apply_categorical_standardization(df: pd.DataFrame, schema_class) -> pd.Data
     if df.empty:
         return df
 
-    result_df = df.copy()
+    result_df = df.copy(deep=False)
 
     # Get the CATEGORICAL_MAPPING from the schema module
     categorical_mappings = _get_schema_attribute(schema_class, 'CATEGORICAL_MAPPING', {})
@@ -243,21 +295,10 @@ def coerce_integer_fields_to_nullable_int(df: pd.DataFrame, schema_class) -> pd.
     if df.empty:
         return df
 
-    result_df = df.copy()
-    schema_instance = schema_class.to_schema()
+    result_df = df.copy(deep=False)
 
     try:
-        int_cols = []
-        for col_name, col_schema in schema_instance.columns.items():
-            dtype = getattr(col_schema, "dtype", None)
-            if dtype is None:
-                continue
-            alias = getattr(dtype, "str_alias", None)
-            dtypes_to_check = [str(dtype).lower()]
-            if alias is not None:
-                dtypes_to_check.append(str(alias).lower())
-            if any(s.startswith("int") for s in dtypes_to_check):
-                int_cols.append(col_name)
+        int_cols = _integer_fields(schema_class)
 
         coerced = []
         for c in int_cols:
@@ -290,7 +331,7 @@ def generate_record_id(df: pd.DataFrame, schema_class) -> pd.DataFrame:
     if df.empty:
         return df
 
-    result_df = df.copy()
+    result_df = df.copy(deep=False)
 
     # Get volatile columns to exclude from hash calculation
     exclude_cols = set(_get_schema_attribute(schema_class, 'COLS_VOLATILE', []))
@@ -304,14 +345,29 @@ def generate_record_id(df: pd.DataFrame, schema_class) -> pd.DataFrame:
         logger.warning("No columns available for hash calculation after excluding volatile fields")
         return result_df
 
-    hash_series = result_df[cols_for_hash].astype(str).sum(axis=1)
-    result_df["record_id"] = hash_series.apply(lambda x: hashlib.md5(x.encode()).hexdigest()[:16])
+    # Concatenate column-wise (same strings as a row-wise astype(str).sum) so the
+    # join runs in pandas rather than a per-row Python reduction
+    parts = [result_df[c].astype(str) for c in cols_for_hash]
+    hash_series = parts[0].str.cat(parts[1:]) if len(parts) > 1 else parts[0]
+    result_df["record_id"] = [hashlib.md5(x.encode()).hexdigest()[:16] for x in hash_series]
 
     logger.debug(f"Generated record_id using {len(cols_for_hash)} columns (excluded {len(exclude_cols)} volatile columns)")
 
     return result_df
 
 
+def get_change_columns(schema_class) -> List[str]:
+    """
+    Return the COLS_VOLATILE columns that can differ between rows sharing a record_id.
+
+    record_id hashes every non-volatile column, so only these columns tell a changed
+    row apart from a re-sent one. Audit columns (record_id, created_at, updated_at)
+    are excluded.
+    """
+    volatile = _get_schema_attribute(schema_class, 'COLS_VOLATILE', [])
+    return [c for c in volatile if c not in ('record_id', 'created_at', 'updated_at')]
+
+
 def generate_entity_id(df: pd.DataFrame, schema_class) -> pd.DataFrame:
     """
     Generate stable entity_id by hashing key columns from COLS_ENTITY.
@@ -338,12 +394,19 @@ def generate_entity_id(df: pd.DataFrame, schema_class) -> pd.DataFrame:
         logger.warning(f"generate_entity_id: no key columns present from {key_cols}; skipping.")
         return df
 
-    def calc(row):
-        composite = "|".join(str(row.get(c, "")) for c in available)
-        return hashlib.md5(composite.encode("utf-8")).hexdigest()[:16]
+    # Build the "|"-joined composite column-wise rather than boxing every row
+    # as a Series via apply(axis=1). Those rows took the whole frame's common
+    # dtype (ints became floats next to a float column in all-numeric frames),
+    # so cast to the same row dtype first to keep str() and the entity_id unchanged.
+    key_frame = df[available]
+    row_dtype = df.iloc[0].dtype
+    if row_dtype != object:
+        key_frame = key_frame.astype(row_dtype)
+    parts = [key_frame[c].astype(object).map(str) for c in available]
+    composite = parts[0].str.cat(parts[1:], sep="|") if len(parts) > 1 else parts[0]
 
-    result_df = df.copy()
-    result_df["entity_id"] = result_df.apply(calc, axis=1)
+    result_df = df.copy(deep=False)
+    result_df["entity_id"] = [hashlib.md5(value.encode("utf-8")).hexdigest()[:16] for value in composite]
 
     logger.debug(f"Generated entity_id using {len(available)} key columns: {available}")
 
@@ -356,25 +419,35 @@ def deduplicate_by_record_id(df: pd.DataFrame) -> pd.DataFrame:
         logger.debug("DataFrame is empty or missing record_id column - no deduplication performed")
         return df
 
-    working = df.copy()
+    working = df.copy(deep=False)
 
     # Normalise timestamps – fall back to NaT when missing
-    working["updated_at"] = pd.to_datetime(working.get("updated_at"), utc=True, errors="coerce")
+    updated = working.get("updated_at")
+    if updated is None or not isinstance(updated.dtype, pd.DatetimeTZDtype):
+        working["updated_at"] = pd.to_datetime(updated, utc=True, errors="coerce")
+    elif str(updated.dt.tz) != "UTC":
+        working["updated_at"] = updated.dt.tz_convert("UTC")
+
+    # Fast path: a batch without repeated record_ids needs no groupby; each row
+    # is its own group so created_at == updated_at. Output shape matches below.
+    if not working["record_id"].duplicated().any():
+        working = working.dropna(subset=["record_id"]).sort_values("record_id", kind="mergesort")
+        value_cols = [c for c in working.columns if c not in ("record_id", "created_at", "updated_at")]
+        working["created_at"] = working["updated_at"]
+        return working[["record_id", *value_cols, "created_at", "updated_at"]].reset_index(drop=True)
 
     # Order so the first row per record_id represents the earliest observation
     working = working.sort_values(["record_id", "updated_at"], kind="mergesort", na_position="last")
 
-    baseline = working.groupby("record_id", as_index=False).first()
-
-    # Compute min/max updated_at to drive created/updated timestamps
-    stats = working.groupby("record_id")["updated_at"].agg(["min", "max"]).rename(
-        columns={"min": "created_at", "max": "updated_at"}
-    )
+    grouped = working.groupby("record_id")
+    result = grouped.first().drop(columns=["created_at", "updated_at"], errors="ignore")
 
-    baseline = baseline.drop(columns=["created_at", "updated_at"], errors="ignore")
-    result = baseline.merge(stats, on="record_id", how="left")
+    # Min/max updated_at drive created/updated timestamps; both share the
+    # record_id index with ``result`` so no hash join is needed to attach them
+    result["created_at"] = grouped["updated_at"].min()
+    result["updated_at"] = grouped["updated_at"].max()
 
-    return result
+    return result.reset_index()
 
 
 def add_missing_schema_fields(df: pd.DataFrame, schema_class) -> pd.DataFrame:
@@ -392,7 +465,7 @@ def add_missing_schema_fields(df: pd.DataFrame, schema_class) -> pd.DataFrame:
     if df.empty:
         return df
 
-    result_df = df.copy()
+    result_df = df.copy(deep=False)
     schema_instance = schema_class.to_schema()
 
     # Track which fields were added
@@ -475,7 +548,7 @@ def drop_extra_columns_not_in_schema(df: pd.DataFrame, schema_class) -> pd.DataF
     if df.empty:
         return df
 
-    result_df = df.copy()
+    result_df = df
     schema_instance = schema_class.to_schema()
 
     # Get the list of columns from the schema
@@ -540,7 +613,7 @@ def coerce_timestamp_columns_to_utc(df: pd.DataFrame, schema_class) -> pd.DataFr
     if df.empty:
         return df
 
-    result_df = df.copy()
+    result_df = df.copy(deep=False)
 
     # Get COLS_TIMESTAMP from the schema module
     timestamp_columns = _get_schema_attribute(schema_class, 'COLS_TIMESTAMP', [])
@@ -558,8 +631,13 @@ def coerce_timestamp_columns_to_utc(df: pd.DataFrame, schema_class) -> pd.DataFr
             continue
 
         try:
-            # Convert to datetime64[ns, UTC] and floor to seconds
-            result_df[col_name] = pd.to_datetime(df[col_name], utc=True, errors='coerce').dt.floor('s')
+            # Convert to datetime64[ns, UTC] and floor to seconds; tz-aware columns
+            # (e.g. from the epoch conversion) only need a tz_convert, not a parse
+            if isinstance(df[col_name].dtype, pd.DatetimeTZDtype):
+                ts = df[col_name].dt.tz_convert('UTC')
+            else:
+                ts = pd.to_datetime(df[col_name], utc=True, errors='coerce')
+            result_df[col_name] = ts.dt.floor('s')
 
             coerced_count += 1
             logger.debug(f"Coerced column '{col_name}' to datetime64[ns, UTC] and floored to seconds")
@@ -601,7 +679,7 @@ def filter_null_rows_by_columns(df: pd.DataFrame, schema_class) -> pd.DataFrame:
     initial_count = len(df)
 
     # Filter out rows where any of the specified columns are null
-    result_df = df.copy()
+    result_df = df
 
     # Build filter condition for each column
     filter_conditions = []
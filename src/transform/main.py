@@ -2,12 +2,14 @@
 
 from __future__ import annotations
 
+import heapq
 import os
 from typing import Dict, List, Tuple
 
 from google.cloud import storage
 
 from common.logging_utils import logger
+from gcs.storage_utils import get_storage_client
 from .transform_realtime import process_realtime_batch
 from .transform_schedule import process_schedule_batch
 
@@ -37,10 +39,12 @@ def _get_config() -> Dict[str, str]:
     }
 
 
-def _list_cache_blobs(client: storage.Client, bucket: str, prefix: str) -> List[storage.Blob]:
-    blobs = list(client.bucket(bucket).list_blobs(prefix=prefix))
-    blobs.sort(key=lambda b: (b.time_created or 0, b.name))
-    return blobs
+def _list_cache_blobs(client: storage.Client, bucket: str, prefix: str, limit: int) -> List[storage.Blob]:
+    """Return the ``limit`` oldest cache blobs, ordered by creation time then name."""
+
+    # Partial selection keeps O(limit) blobs in the heap instead of sorting the full listing
+    blobs = client.bucket(bucket).list_blobs(prefix=prefix)
+    return heapq.nsmallest(limit, blobs, key=lambda b: (b.time_created or 0, b.name))
 
 
 def run(request) -> Tuple[Dict[str, object], int]:
@@ -58,10 +62,10 @@ def run(request) -> Tuple[Dict[str, object], int]:
         )
 
     try:
-        storage_client = storage.Client(project=cfg["project_id"])
-        all_blobs = _list_cache_blobs(storage_client, cfg["bucket"], cfg["cache_prefix"])
+        storage_client = get_storage_client(cfg["project_id"])
+        batch = _list_cache_blobs(storage_client, cfg["bucket"], cfg["cache_prefix"], cfg["batch_size"])
 
-        if not all_blobs:
+        if not batch:
             if dataset == "schedule":
                 logger.info("No cached schedule feeds to process.")
                 return {"status": "empty", "dataset": dataset, "feeds": 0, "rows": 0}, 200
@@ -69,8 +73,6 @@ def run(request) -> Tuple[Dict[str, object], int]:
             logger.info("No cached files to process.")
             return {"status": "empty", "dataset": dataset, "rows": 0, "processed": 0, "moved": 0}, 200
 
-        batch = all_blobs[: cfg["batch_size"]]
-
         if dataset == "schedule":
             return process_schedule_batch(cfg, storage_client, batch)
 
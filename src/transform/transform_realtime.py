@@ -4,13 +4,15 @@
 from __future__ import annotations
 
 import json
-from typing import Dict, List, Sequence, Tuple
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
 
 import pandas as pd
 from google.cloud import storage
 
 from common.logging_utils import logger
-from schemas.common.schema_utils import clean_and_validate_dataframe
+from schemas.common.schema_utils import clean_and_validate_dataframe, get_change_columns
 from schemas.common.schema_registry import get_schema_class
 from big_query.batch_upsert import upsert_batch
 from .transform_utils import (
@@ -49,19 +51,53 @@ def _extract_entities(payload: Dict[str, object]) -> List[Dict[str, object]]:
     return entities
 
 
+# Blob downloads are network-bound, so a small pool overlaps their round trips.
+DOWNLOAD_WORKERS = 8
+
+
+def _load_payload(blob: storage.Blob) -> Optional[Dict[str, object]]:
+    """Download and decode one cache blob, returning ``None`` on failure."""
+
+    try:
+        payload_bytes = read_blob_bytes(blob, log_details=True)
+        return json.loads(payload_bytes.decode("utf-8"))
+    except Exception as exc:
+        logger.error("Failed to load realtime blob %s: %s", blob.name, exc)
+        return None
+
+
+def _iter_payloads(blobs: Sequence[storage.Blob]) -> Iterator[Tuple[storage.Blob, Optional[Dict[str, object]]]]:
+    """Yield ``(blob, payload)`` in blob order, downloading ahead on a bounded window.
+
+    At most ``DOWNLOAD_WORKERS`` downloads are pending or buffered at once, so
+    decoded payloads are released as the caller consumes them rather than the
+    whole batch being held in memory.
+    """
+
+    with ThreadPoolExecutor(max_workers=min(DOWNLOAD_WORKERS, len(blobs))) as executor:
+        pending = deque()
+        for blob in blobs:
+            if len(pending) >= DOWNLOAD_WORKERS:
+                done_blob, future = pending.popleft()
+                yield done_blob, future.result()
+            pending.append((blob, executor.submit(_load_payload, blob)))
+        while pending:
+            done_blob, future = pending.popleft()
+            yield done_blob, future.result()
+
+
 def _transform_blobs(dataset: str, blobs: Sequence[storage.Blob]) -> Tuple[pd.DataFrame, int]:
     """Download, decode, and normalize a batch of realtime cache blobs."""
 
     frames: List[pd.DataFrame] = []
     processed = 0
 
-    for blob in blobs:
+    if not blobs:
+        return pd.DataFrame(), processed
 
-        try:
-            payload_bytes = read_blob_bytes(blob, log_details=True)
-            payload = json.loads(payload_bytes.decode("utf-8"))
-        except Exception as exc:
-            logger.error("Failed to load realtime blob %s: %s", blob.name, exc)
+    # Downloads run concurrently a few blobs ahead of the transform, in blob order
+    for blob, payload in _iter_payloads(blobs):
+        if payload is None:
             continue
 
         entities = _extract_entities(payload)
@@ -145,6 +181,7 @@ def process_realtime_batch(
                 table_name,
                 cfg["project_id"],
                 cfg["bq_dataset"],
+                compare_columns=get_change_columns(schema_class),
             )
         logger.info(
             "Realtime BigQuery upsert complete: table=%s rows=%d duration=%.2fs",
@@ -5,6 +5,7 @@ from __future__ import annotations
 
 import io
 import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from time import monotonic
 from typing import Dict, List, Sequence, Tuple
 
@@ -17,6 +18,10 @@ from schemas.common.schema_registry import get_schema_class
 from big_query.batch_insert import insert_batch
 from .transform_utils import Timer, build_response, read_blob_bytes
 
+# GTFS feeds carry roughly a dozen tables; a few concurrent loads overlap the
+# BigQuery job waits without holding many decoded tables in memory at once.
+SCHEDULE_FILE_WORKERS = 4
+
 
 def _extract_feed_hash(blob: storage.Blob) -> str:
     metadata = blob.metadata or {}
@@ -43,6 +48,112 @@ def _transform_schedule_df(dataset: str, df: pd.DataFrame) -> pd.DataFrame:
         return pd.DataFrame()
 
 
+def _process_schedule_file(
+    cfg: Dict[str, str],
+    blob: storage.Blob,
+    archive: zipfile.ZipFile,
+    filename: str,
+    feed_hash: str,
+) -> Dict[str, object]:
+    """Read, transform, and load one table from a schedule ZIP.
+
+    Returns a dict with ``status`` of ``loaded``, ``skipped`` or ``error`` plus
+    the table summary or error entry for the caller to aggregate.
+    """
+
+    read_start = monotonic()
+    try:
+        with archive.open(filename) as file_handle:
+            df_raw = pd.read_csv(file_handle)
+        read_seconds = monotonic() - read_start
+    except Exception as exc:
+        read_seconds = monotonic() - read_start
+        logger.error(
+            "Schedule file read failed: blob=%s file=%s error=%s read=%.2fs",
+            blob.name,
+            filename,
+            exc,
+            read_seconds,
+        )
+        return {"status": "error", "error": {"file": filename, "error": f"read_csv_failed: {exc}"}}
+
+    if df_raw.empty:
+        logger.info(
+            "Schedule file skipped (empty): blob=%s file=%s read=%.2fs",
+            blob.name,
+            filename,
+            read_seconds,
+        )
+        return {"status": "skipped"}
+
+    df_raw["feed_hash"] = feed_hash
+    dataset_key = filename.split(".")[0]
+
+    transform_start = monotonic()
+    df_processed = _transform_schedule_df(dataset_key, df_raw)
+    transform_seconds = monotonic() - transform_start
+    if df_processed.empty:
+        logger.info(
+            "Schedule file skipped (post-transform empty): blob=%s file=%s read=%.2fs transform=%.2fs",
+            blob.name,
+            filename,
+            read_seconds,
+            transform_seconds,
+        )
+        return {"status": "skipped"}
+
+    table_name = f"stg_{dataset_key.replace('-', '_')}"
+    insert_seconds = 0.0
+    try:
+        insert_start = monotonic()
+        result = insert_batch(
+            df_processed,
+            table_name,
+            cfg["project_id"],
+            cfg["bq_dataset"],
+        )
+        insert_seconds = monotonic() - insert_start
+    except Exception as exc:  # pragma: no cover - upload safety net
+        insert_seconds = monotonic() - insert_start if insert_seconds == 0.0 else insert_seconds
+        logger.error(
+            "Schedule file insert failed: blob=%s file=%s table=%s error=%s read=%.2fs transform=%.2fs insert=%.2fs",
+            blob.name,
+            filename,
+            table_name,
+            exc,
+            read_seconds,
+            transform_seconds,
+            insert_seconds,
+        )
+        return {"status": "error", "error": {"file": filename, "error": f"bq_upload_failed: {exc}"}}
+
+    logger.info(
+        "Schedule file loaded: blob=%s file=%s table=%s rows=%d read=%.2fs transform=%.2fs insert=%.2fs",
+        blob.name,
+        filename,
+        table_name,
+        len(df_processed),
+        read_seconds,
+        transform_seconds,
+        insert_seconds,
+    )
+
+    return {
+        "status": "loaded",
+        "table": {
+            "file": filename,
+            "rows": len(df_processed),
+            "table": table_name,
+            "result": result,
+            "timings": {
+                "read_seconds": read_seconds,
+                "transform_seconds": transform_seconds,
+                "insert_seconds": insert_seconds,
+            },
+        },
+    }
+
+
 def _process_schedule_blob(cfg: Dict[str, str], blob: storage.Blob, zip_bytes: bytes) -> Dict[str, object]:
     """Unpack a cached schedule ZIP and load each table, logging timings."""
 
@@ -57,105 +168,29 @@ def _process_schedule_blob(cfg: Dict[str, str], blob: storage.Blob, zip_bytes: b
 
     try:
         with zipfile.ZipFile(io.BytesIO(zip_bytes)) as archive:
-            for filename in archive.namelist():
-                if filename.endswith("/"):
-                    continue
-
-                read_start = monotonic()
-                try:
-                    with archive.open(filename) as file_handle:
-                        df_raw = pd.read_csv(file_handle)
-                    read_seconds = monotonic() - read_start
-                except Exception as exc:
-                    read_seconds = monotonic() - read_start
-                    logger.error(
-                        "Schedule file read failed: blob=%s file=%s error=%s read=%.2fs",
-                        blob.name,
-                        filename,
-                        exc,
-                        read_seconds,
-                    )
-                    errors.append({"file": filename, "error": f"read_csv_failed: {exc}"})
-                    continue
-
-                if df_raw.empty:
-                    logger.info(
-                        "Schedule file skipped (empty): blob=%s file=%s read=%.2fs",
-                        blob.name,
-                        filename,
-                        read_seconds,
+            filenames = [name for name in archive.namelist() if not name.endswith("/")]
+
+            # Tables are independent and dominated by BigQuery load-job waits, so
+            # run them on a small pool; results are aggregated in archive order.
+            if filenames:
+                with ThreadPoolExecutor(max_workers=min(SCHEDULE_FILE_WORKERS, len(filenames))) as executor:
+                    outcomes = list(
+                        executor.map(
+                            lambda name: _process_schedule_file(cfg, blob, archive, name, feed_hash),
+                            filenames,
+                        )
                     )
+            else:
+                outcomes = []
+
+            for filename, outcome in zip(filenames, outcomes):
+                if outcome["status"] == "loaded":
+                    tables_loaded.append(outcome["table"])
+                    rows_inserted += outcome["table"]["rows"]
+                elif outcome["status"] == "skipped":
                     files_skipped.append(filename)
-                    continue
-
-                df_raw["feed_hash"] = feed_hash
-                dataset_key = filename.split(".")[0]
-
-                transform_start = monotonic()
-                df_processed = _transform_schedule_df(dataset_key, df_raw)
-                transform_seconds = monotonic() - transform_start
-                if df_processed.empty:
-                    logger.info(
-                        "Schedule file skipped (post-transform empty): blob=%s file=%s read=%.2fs transform=%.2fs",
-                        blob.name,
-                        filename,
-                        read_seconds,
-                        transform_seconds,
-                    )
-                    files_skipped.append(filename)
-                    continue
-
-                table_name = f"stg_{dataset_key.replace('-', '_')}"
-                insert_seconds = 0.0
-                try:
-                    insert_start = monotonic()
-                    result = insert_batch(
-                        df_processed,
-                        table_name,
-                        cfg["project_id"],
-                        cfg["bq_dataset"],
-                    )
-                    insert_seconds = monotonic() - insert_start
-                except Exception as exc:  # pragma: no cover - upload safety net
-                    insert_seconds = monotonic() - insert_start if insert_seconds == 0.0 else insert_seconds
-                    logger.error(
-                        "Schedule file insert failed: blob=%s file=%s table=%s error=%s read=%.2fs transform=%.2fs insert=%.2fs",
-                        blob.name,
-                        filename,
-                        table_name,
-                        exc,
-                        read_seconds,
-                        transform_seconds,
-                        insert_seconds,
-                    )
-                    errors.append({"file": filename, "error": f"bq_upload_failed: {exc}"})
-                    continue
-
-                tables_loaded.append(
-                    {
-                        "file": filename,
-                        "rows": len(df_processed),
-                        "table": table_name,
-                        "result": result,
-                        "timings": {
-                            "read_seconds": read_seconds,
-                            "transform_seconds": transform_seconds,
-                            "insert_seconds": insert_seconds,
-                        },
-                    }
-                )
-                rows_inserted += len(df_processed)
-
-                logger.info(
-                    "Schedule file loaded: blob=%s file=%s table=%s rows=%d read=%.2fs transform=%.2fs insert=%.2fs",
-                    blob.name,
-                    filename,
-                    table_name,
-                    len(df_processed),
-                    read_seconds,
-                    transform_seconds,
-                    insert_seconds,
-                )
+                else:
+                    errors.append(outcome["error"])
 
     except zipfile.BadZipFile as exc:
         errors.append({"file": blob.name, "error": f"bad_zip: {exc}"})
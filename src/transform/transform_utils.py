@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 import gzip
+from concurrent.futures import ThreadPoolExecutor
 from time import monotonic
 from typing import Callable, Dict, Iterable, Tuple, TypeVar
 
@@ -44,13 +45,13 @@ def move_to_final(
     *,
     cache_prefix: str,
     final_prefix: str,
+    max_workers: int = 8,
 ) -> int:
     """Copy processed blobs out of the cache prefix and delete originals."""
 
-    moved = 0
     src_bucket = client.bucket(bucket)
 
-    for blob in blobs:
+    def _move(blob: storage.Blob) -> bool:
         new_name = blob.name
         if cache_prefix in new_name:
             new_name = new_name.replace(cache_prefix, final_prefix, 1)
@@ -60,11 +61,18 @@ def move_to_final(
         try:
             src_bucket.copy_blob(blob, src_bucket, new_name)
             blob.delete()
-            moved += 1
+            return True
         except Exception as exc:  # pragma: no cover - defensive logging
             logger.error("Failed moving %s -> %s: %s", blob.name, new_name, exc)
+            return False
 
-    return moved
+    blobs = list(blobs)
+    if not blobs:
+        return 0
+
+    # Each move is two independent GCS round trips; overlap them across blobs.
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(blobs))) as executor:
+        return sum(executor.map(_move, blobs))
 
 
 class Timer: